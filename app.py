@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import pyarrow as pa
 
 st.set_page_config(page_title="Irasse Construction HR Report", layout="wide")
 
@@ -13,15 +13,65 @@ uploaded_file = st.sidebar.file_uploader("Upload HR Data CSV", type="csv")
 # -------------------------------
 # Load Data
 # -------------------------------
+HR_DTYPES = {
+    "EmployeeNr": "string",
+    "Hours Worked": "float32",
+    "Salary Per Hour": "float32",
+    "Absenteeism Days": "Int32",
+}
+
+COUNTED_COLUMNS = ("Department", "Position", "Gender", "Turnover Type", "Turnover Reason")
+
+# Top/bottom n rows by one column: select on that Series only, then fetch the two columns
+def extreme_rows(df, col, n, largest):
+    picked = df[col].nlargest(n) if largest else df[col].nsmallest(n)
+    return df.loc[picked.index, ["EmployeeNr", col]]
+
 @st.cache_data
-def load_data(file):
-    df = pd.read_csv(file)
-    return df
+def prepare_hr(file):
+    df = pd.read_csv(file, dtype=HR_DTYPES)
 
-if uploaded_file is not None:
-    df = load_data(uploaded_file)
+    # Low-cardinality labels: categorical value_counts counts codes, not strings.
+    # Categories follow first appearance so count ties keep the file's order.
+    for col in COUNTED_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(pd.CategoricalDtype(df[col].dropna().unique()))
+
+    # Whole-number hours display as integers, as in the source file
+    if "Hours Worked" in df.columns:
+        hours = df["Hours Worked"]
+        if (hours.dropna() % 1 == 0).all():
+            df["Hours Worked"] = hours.astype("Int32")
+
+    if "Exit Date" in df.columns:
+        df["Exit Date"] = pd.to_datetime(df["Exit Date"], dayfirst=True, errors="coerce")
+
+    cols = set(df.columns)
+    vcs = {c: df[c].value_counts() for c in COUNTED_COLUMNS if c in cols}
+    filled = {c: int(df[c].count()) for c in ("Promotion", "Exit Date") if c in cols}
+
+    # Arrow tables are handed to st.dataframe as-is, with no per-rerun conversion
+    rankings = {}
+    if "Hours Worked" in cols and "EmployeeNr" in cols:
+        for name, largest in (("top5", True), ("bottom5", False)):
+            rows = extreme_rows(df, "Hours Worked", 5, largest)
+            rankings[name] = pa.Table.from_pandas(rows, preserve_index=True)
+    return df, cols, vcs, filled, rankings
+
+# Plain-dict figures skip building a plotly.express figure; st.plotly_chart validates them once when drawn
+def bar_chart(vc, label, title):
+    return {
+        "data": [{"type": "bar", "x": vc.index.tolist(), "y": vc.values.tolist()}],
+        "layout": {
+            "title": {"text": title},
+            "xaxis": {"title": {"text": label}},
+            "yaxis": {"title": {"text": "count"}},
+        },
+    }
 
 if uploaded_file is not None:
+    df, cols, vcs, filled, rankings = prepare_hr(uploaded_file)
+
     st.title("HR Report for Irasse Construction")
 
     # -------------------------------
@@ -32,21 +82,17 @@ if uploaded_file is not None:
     total_employees = len(df)
     st.metric("Total Employees", total_employees)
 
-    if "Department" in df.columns:
-        dept_counts = df["Department"].value_counts().reset_index()
-        dept_counts.columns = ["Department", "count"]
-        fig = px.bar(dept_counts, x="Department", y="count", title="Employees by Department")
+    if "Department" in cols:
+        fig = bar_chart(vcs["Department"], "Department", "Employees by Department")
         st.plotly_chart(fig, use_container_width=True)
 
-    if "Position" in df.columns:
-        role_counts = df["Position"].value_counts().reset_index()
-        role_counts.columns = ["Position", "count"]
-        fig = px.bar(role_counts, x="Position", y="count", title="Employees by Role")
+    if "Position" in cols:
+        fig = bar_chart(vcs["Position"], "Position", "Employees by Role")
         st.plotly_chart(fig, use_container_width=True)
 
     # ---- Promotions ----
-    if "Promotion" in df.columns:
-        total_promotions = df["Promotion"].notna().sum()
+    if "Promotion" in cols:
+        total_promotions = filled["Promotion"]
         st.metric("Total Promotions", total_promotions)
 
         
@@ -56,35 +102,30 @@ if uploaded_file is not None:
     # -------------------------------
     st.header("Employee Retention & Turnover")
 
-    if "Exit Date" in df.columns:
-        exits = df["Exit Date"].notna().sum()
+    if "Exit Date" in cols:
+        exits = filled["Exit Date"]
         turnover_rate = round((exits / total_employees) * 100, 1)
         st.metric("Turnover Rate", f"{turnover_rate}%")
 
-        if "Turnover Type" in df.columns:
-            turnover_type_counts = df["Turnover Type"].value_counts().reset_index()
-            turnover_type_counts.columns = ["Type", "count"]
-            fig = px.bar(turnover_type_counts, x="Type", y="count", title="Voluntary vs Involuntary Turnover")
+        if "Turnover Type" in cols:
+            fig = bar_chart(vcs["Turnover Type"], "Type", "Voluntary vs Involuntary Turnover")
             st.plotly_chart(fig, use_container_width=True)
 
-    if "Turnover Reason" in df.columns:
-        reason_counts = df["Turnover Reason"].value_counts().head(5)
+    if "Turnover Reason" in cols:
         st.subheader("Top 5 Turnover Reasons")
-        st.dataframe(reason_counts)
+        st.dataframe(vcs["Turnover Reason"].head(5))
 
     # -------------------------------
     # Performance & Productivity Overview
     # -------------------------------
     st.header("Performance & Productivity Overview")
 
-    if "Hours Worked" in df.columns and "EmployeeNr" in df.columns:
+    if rankings:
         st.subheader("Top 5 Employees (Most Hours Worked)")
-        top5 = df[["EmployeeNr", "Hours Worked"]].nlargest(5, "Hours Worked")
-        st.dataframe(top5)
+        st.dataframe(rankings["top5"])
 
         st.subheader("Bottom 5 Employees (Least Hours Worked)")
-        bottom5 = df[["EmployeeNr", "Hours Worked"]].nsmallest(5, "Hours Worked")
-        st.dataframe(bottom5)
+        st.dataframe(rankings["bottom5"])
 
     # -------------------------------
     # Actionable Insights
@@ -0,0 +1,53 @@
+"""Numba kernels shared by the dashboard pages.
+
+Streamlit re-executes each page script in a fresh module on every rerun, so a
+kernel defined inside a page gets a new, uncompiled dispatcher each time. Kept
+in this normally imported module, a kernel is compiled once per process (and
+cache=True stores the machine code on disk for the next one).
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the pages fall back to NumExpr/NumPy
+    njit = None
+
+if njit is not None:
+    # fastmath without the no-NaN assumption, since zero-revenue margins are NaN
+    @njit(cache=True, fastmath={'contract', 'reassoc', 'arcp', 'nsz'})
+    def fin_kernel(rev, cogs, sal, rent, mkt, util, ip, il, ls,
+                   out_gp, out_op, out_nop, out_tot, out_net, out_gpm, out_npm):
+        """Fused per-row kernel writing every derived financial metric in one pass"""
+        for i in range(rev.shape[0]):
+            gp = rev[i] - cogs[i]
+            op = sal[i] + rent[i] + mkt[i] + util[i]
+            nop = ip[i] + il[i] + ls[i]
+            tot = op + nop
+            net = gp - tot
+            out_gp[i] = gp
+            out_op[i] = op
+            out_nop[i] = nop
+            out_tot[i] = tot
+            out_net[i] = net
+            if rev[i] != 0:
+                out_gpm[i] = gp / rev[i] * 100
+                out_npm[i] = net / rev[i] * 100
+            else:
+                out_gpm[i] = np.nan
+                out_npm[i] = np.nan
+
+    # fastmath without the no-NaN assumption, since missing dates give NaN durations
+    @njit(cache=True, fastmath={'contract', 'reassoc', 'arcp', 'nsz'})
+    def metrics_kernel(planned, actual, hours_planned, hours_actual, budget_planned, budget_actual,
+                       out_sv, out_lp, out_bv):
+        """Fused per-row construction kernel: reads each input once and writes all three metrics"""
+        for i in range(planned.shape[0]):
+            p = planned[i] if planned[i] != 0 else 1.0
+            ha = hours_actual[i] if hours_actual[i] != 0 else 1.0
+            bp = budget_planned[i] if budget_planned[i] != 0 else 1.0
+            out_sv[i] = (planned[i] - actual[i]) / p * 100
+            out_lp[i] = hours_planned[i] / ha * 100
+            out_bv[i] = (budget_actual[i] - budget_planned[i]) / bp * 100
+else:
+    fin_kernel = None
+    metrics_kernel = None
@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
+import pyarrow as pa
+
+from kernels import fin_kernel  # None when numba is not installed
+
+try:
+    import numexpr as ne
+except ImportError:  # numexpr is optional too; plain NumPy is the last resort
+    ne = None
 
 # Page configuration
 st.set_page_config(
@@ -12,153 +18,256 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        color: #1f77b4;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        margin-bottom: 1rem;
-    }
-    .positive-value {
-        color: #2ecc71;
-        font-weight: bold;
-    }
-    .negative-value {
-        color: #e74c3c;
-        font-weight: bold;
-    }
-</style>
-""", unsafe_allow_html=True)
+OPERATING_LABELS = {
+    'salaries': 'Salaries',
+    'rent': 'Rent',
+    'marketing': 'Marketing',
+    'utilities': 'Utilities'
+}
 
-def calculate_financial_metrics(df):
-    """Calculate all financial metrics from the dataframe"""
-    
-    # Calculate derived metrics
-    df['gross_profit'] = df['revenue'] - df['cogs']
-    df['operating_expenses'] = df['salaries'] + df['rent'] + df['marketing'] + df['utilities']
-    df['non_operating_expenses'] = df['interest_paid'] + df['investment_losses'] + df['legal_settlements']
-    df['total_expenses'] = df['operating_expenses'] + df['non_operating_expenses']
-    df['net_profit'] = df['gross_profit'] - df['total_expenses']
-    
-    # Calculate margins
-    df['gross_profit_margin'] = (df['gross_profit'] / df['revenue']) * 100
-    df['net_profit_margin'] = (df['net_profit'] / df['revenue']) * 100
-    
-    return df
+NON_OPERATING_LABELS = {
+    'interest_paid': 'Interest Paid',
+    'investment_losses': 'Investment Losses',
+    'legal_settlements': 'Legal Settlements'
+}
 
-def create_profit_trend_chart(df):
-    """Create profit trend chart"""
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=df['date'], y=df['revenue'], 
-        name='Revenue', line=dict(color='#1f77b4', width=3),
-        mode='lines+markers'
-    ))
+EXPENSE_COLUMNS = [
+    *OPERATING_LABELS, *NON_OPERATING_LABELS,
+    'operating_expenses', 'non_operating_expenses'
+]
+
+INPUT_COLUMNS = [
+    'revenue', 'cogs', 'salaries', 'rent', 'marketing', 'utilities',
+    'interest_paid', 'investment_losses', 'legal_settlements'
+]
+
+METRIC_COLUMNS = [
+    'gross_profit', 'operating_expenses', 'non_operating_expenses',
+    'total_expenses', 'net_profit', 'gross_profit_margin', 'net_profit_margin'
+]
+
+def _numpy_metrics(rev, cogs, sal, rent, mkt, util, ip, il, ls):
+    """Vectorized NumPy fallback used when neither numba nor numexpr is installed"""
+    gp = rev - cogs
+    opex = sal + rent + mkt + util
+    nopex = ip + il + ls
+    tot = opex + nopex
+    net = gp - tot
     
-    fig.add_trace(go.Scatter(
-        x=df['date'], y=df['gross_profit'], 
-        name='Gross Profit', line=dict(color='#ff7f0e', width=3),
-        mode='lines+markers'
-    ))
+    # Calculate margins (NaN where there was no revenue)
+    has_revenue = rev != 0
+    gpm = np.divide(gp, rev, out=np.full_like(gp, np.nan), where=has_revenue) * 100
+    npm = np.divide(net, rev, out=np.full_like(net, np.nan), where=has_revenue) * 100
     
-    fig.add_trace(go.Scatter(
-        x=df['date'], y=df['net_profit'], 
-        name='Net Profit', line=dict(color='#2ca02c', width=3),
-        mode='lines+markers'
-    ))
+    return gp, opex, nopex, tot, net, gpm, npm
+
+def _numexpr_metrics(rev, cogs, sal, rent, mkt, util, ip, il, ls):
+    """Blocked, multi-threaded NumExpr evaluation used when numba is not installed"""
+    env = dict(revenue=rev, cogs=cogs, salaries=sal, rent=rent, marketing=mkt,
+               utilities=util, interest_paid=ip, investment_losses=il,
+               legal_settlements=ls, nan=np.nan, pct=100.0)
     
-    fig.update_layout(
-        title='Profit Trends Over 30 Days',
-        xaxis_title='Date',
-        yaxis_title='Amount ($)',
-        hovermode='x unified',
-        height=400,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    gp = ne.evaluate("revenue - cogs", local_dict=env)
+    opex = ne.evaluate("salaries + rent + marketing + utilities", local_dict=env)
+    nopex = ne.evaluate("interest_paid + investment_losses + legal_settlements", local_dict=env)
+    tot = opex + nopex
+    net = ne.evaluate(
+        "revenue - cogs - salaries - rent - marketing - utilities"
+        " - interest_paid - investment_losses - legal_settlements",
+        local_dict=env
     )
     
-    return fig
-
-def create_expenses_chart(df):
-    """Create expenses breakdown chart"""
-    # Sum expenses by category
-    operating_expenses = {
-        'Salaries': df['salaries'].sum(),
-        'Rent': df['rent'].sum(),
-        'Marketing': df['marketing'].sum(),
-        'Utilities': df['utilities'].sum()
-    }
+    # Calculate margins (NaN where there was no revenue)
+    env.update(gp=gp, net=net)
+    gpm = ne.evaluate("where(revenue != 0, gp / revenue * pct, nan)", local_dict=env)
+    npm = ne.evaluate("where(revenue != 0, net / revenue * pct, nan)", local_dict=env)
     
-    non_operating_expenses = {
-        'Interest Paid': df['interest_paid'].sum(),
-        'Investment Losses': df['investment_losses'].sum(),
-        'Legal Settlements': df['legal_settlements'].sum()
-    }
+    return gp, opex, nopex, tot, net, gpm, npm
+
+def calculate_financial_metrics(df):
+    """Calculate all financial metrics from the dataframe"""
     
-    # Create subplots
-    fig = go.Figure()
+    inputs = tuple(df[c].to_numpy(dtype='float64') for c in INPUT_COLUMNS)
     
-    # Operating expenses
-    fig.add_trace(go.Bar(
-        x=list(operating_expenses.keys()),
-        y=list(operating_expenses.values()),
-        name='Operating Expenses',
-        marker_color='#1f77b4'
-    ))
+    if fin_kernel is not None:
+        outputs = tuple(np.empty_like(inputs[0]) for _ in METRIC_COLUMNS)
+        fin_kernel(*inputs, *outputs)
+    elif ne is not None:
+        outputs = _numexpr_metrics(*inputs)
+    else:
+        outputs = _numpy_metrics(*inputs)
     
-    # Non-operating expenses
-    fig.add_trace(go.Bar(
-        x=list(non_operating_expenses.keys()),
-        y=list(non_operating_expenses.values()),
-        name='Non-Operating Expenses',
-        marker_color='#ff7f0e'
-    ))
+    metrics = pd.DataFrame(dict(zip(METRIC_COLUMNS, outputs)), index=df.index)
+    return pd.concat([df, metrics], axis=1)
+
+@st.cache_resource
+def warm_up_metrics_kernel():
+    """Compile the numba kernel once per server process instead of on first upload"""
+    if fin_kernel is not None:
+        calculate_financial_metrics(pd.DataFrame({c: np.ones(1) for c in INPUT_COLUMNS}))
+
+warm_up_metrics_kernel()
+
+@st.cache_data(ttl="1h", max_entries=8)
+def load_and_prepare(file):
+    """Read the uploaded CSV, add the derived financial metrics and build the preview"""
+    df = pd.read_csv(
+        file,
+        engine='pyarrow',
+        parse_dates=['date'],
+        # float64: float32 cannot hold cent amounts above about $100k exactly
+        dtype={c: 'float64' for c in INPUT_COLUMNS}
+    )
+    # Sort once here so charts and the preview never have to. Blank dates go
+    # first, so the newest-first preview below keeps them at the bottom.
+    df = df.sort_values('date', kind='stable', na_position='first', ignore_index=True)
+    df = calculate_financial_metrics(df)
     
-    fig.update_layout(
-        title='Expenses Breakdown',
-        xaxis_title='Expense Category',
-        yaxis_title='Amount ($)',
-        barmode='group',
-        height=400
+    # Newest ten rows, prebuilt as Arrow so the preview skips pandas->Arrow per rerun
+    preview = pa.Table.from_pandas(df.iloc[-10:][::-1], preserve_index=False)
+    return df, preview
+
+def _line_trace(x, y, name, color, **extra):
+    """Plain-dict WebGL line trace; st.plotly_chart validates it once when drawn"""
+    return dict(
+        type='scattergl', x=x, y=y,
+        name=name, line=dict(color=color, width=3),
+        mode='lines+markers', **extra
     )
+
+def column_total(series):
+    """Sum a column in float64, skipping NaN like pandas"""
+    return np.nansum(series.to_numpy(), dtype='float64')
+
+def margin_pct(part, total):
+    """part / total as a percentage; a zero total gives inf/nan as pandas did, not an error"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.float64(part) / total * 100
+
+def create_profit_trend_chart(df):
+    """Create profit trend chart"""
+    return dict(
+        data=[
+            _line_trace(df['date'], df['revenue'], 'Revenue', '#1f77b4'),
+            _line_trace(df['date'], df['gross_profit'], 'Gross Profit', '#ff7f0e'),
+            _line_trace(df['date'], df['net_profit'], 'Net Profit', '#2ca02c')
+        ],
+        layout=dict(
+            title=dict(text='Profit Trends Over 30 Days'),
+            xaxis=dict(title=dict(text='Date')),
+            yaxis=dict(title=dict(text='Amount ($)')),
+            hovermode='x unified',
+            height=400,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+    )
+
+def summarize_expenses(df):
+    """Sum every expense column in a single reduction"""
+    totals = np.nansum(df[EXPENSE_COLUMNS].to_numpy(), axis=0, dtype='float64')
+    return pd.Series(totals, index=EXPENSE_COLUMNS)
+
+def expense_group(sums, labels):
+    """Select one expense group from the precomputed sums, keyed by display label"""
+    return sums[list(labels)].rename(labels)
+
+@st.cache_data(max_entries=8)
+def create_expenses_chart(sums):
+    """Create expenses breakdown chart from precomputed expense sums"""
+    operating_expenses = expense_group(sums, OPERATING_LABELS)
+    non_operating_expenses = expense_group(sums, NON_OPERATING_LABELS)
     
-    return fig
+    return dict(
+        data=[
+            dict(
+                type='bar',
+                x=operating_expenses.index.tolist(),
+                y=operating_expenses.values.tolist(),
+                name='Operating Expenses',
+                marker=dict(color='#1f77b4')
+            ),
+            dict(
+                type='bar',
+                x=non_operating_expenses.index.tolist(),
+                y=non_operating_expenses.values.tolist(),
+                name='Non-Operating Expenses',
+                marker=dict(color='#ff7f0e')
+            )
+        ],
+        layout=dict(
+            title=dict(text='Expenses Breakdown'),
+            xaxis=dict(title=dict(text='Expense Category')),
+            yaxis=dict(title=dict(text='Amount ($)')),
+            barmode='group',
+            height=400
+        )
+    )
+
+def expenses_table(heading, amounts, total_label, total):
+    """Render an expense group as one markdown table"""
+    # Escape "$" so Streamlit doesn't pair them up as LaTeX delimiters
+    rows = "\n".join(f"| {name} | \\${amount:,.2f} |" for name, amount in amounts.items())
+    return (
+        f"| {heading} | Amount |\n|---|---:|\n{rows}\n"
+        f"| **{total_label}** | **\\${total:,.2f}** |"
+    )
 
 def create_margin_chart(df):
     """Create profit margin trend chart"""
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatter(
-        x=df['date'], y=df['gross_profit_margin'], 
-        name='Gross Profit Margin', line=dict(color='#ff7f0e', width=3),
-        mode='lines+markers', hovertemplate='%{y:.1f}%'
-    ))
+    return dict(
+        data=[
+            _line_trace(df['date'], df['gross_profit_margin'], 'Gross Profit Margin', '#ff7f0e',
+                        hovertemplate='%{y:.1f}%'),
+            _line_trace(df['date'], df['net_profit_margin'], 'Net Profit Margin', '#2ca02c',
+                        hovertemplate='%{y:.1f}%')
+        ],
+        layout=dict(
+            title=dict(text='Profit Margin Trends'),
+            xaxis=dict(title=dict(text='Date')),
+            yaxis=dict(title=dict(text='Margin (%)')),
+            hovermode='x unified',
+            height=400,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+    )
+
+@st.fragment
+def render_profit_tab(df):
+    """Profit trends tab, rerun independently of the rest of the page"""
+    st.plotly_chart(create_profit_trend_chart(df), use_container_width=True)
+
+@st.fragment
+def render_expenses_tab(df):
+    """Expenses breakdown tab with its detailed summary"""
+    sums = summarize_expenses(df)
+    st.plotly_chart(create_expenses_chart(sums), use_container_width=True)
     
-    fig.add_trace(go.Scatter(
-        x=df['date'], y=df['net_profit_margin'], 
-        name='Net Profit Margin', line=dict(color='#2ca02c', width=3),
-        mode='lines+markers', hovertemplate='%{y:.1f}%'
-    ))
+    # Detailed expenses breakdown
+    st.subheader("Detailed Expenses Summary")
+    exp_col1, exp_col2 = st.columns(2)
     
-    fig.update_layout(
-        title='Profit Margin Trends',
-        xaxis_title='Date',
-        yaxis_title='Margin (%)',
-        hovermode='x unified',
-        height=400,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-    )
+    with exp_col1:
+        st.markdown(expenses_table(
+            "Operating Expenses", expense_group(sums, OPERATING_LABELS),
+            'Total Operating', sums['operating_expenses']
+        ))
     
-    return fig
+    with exp_col2:
+        st.markdown(expenses_table(
+            "Non-Operating Expenses", expense_group(sums, NON_OPERATING_LABELS),
+            'Total Non-Operating', sums['non_operating_expenses']
+        ))
+
+@st.fragment
+def render_margins_tab(df):
+    """Profit margins tab"""
+    st.plotly_chart(create_margin_chart(df), use_container_width=True)
+
+@st.fragment
+def render_data_preview(preview):
+    """Most recent rows of the uploaded data, as the Arrow table from the loader"""
+    st.header(" Data Preview")
+    st.dataframe(preview, use_container_width=True)
 
 def main():
     st.title("Financial Dashboard")
@@ -174,9 +283,7 @@ def main():
     if uploaded_file is not None:
         try:
             # Read and process data
-            df = pd.read_csv(uploaded_file)
-            df['date'] = pd.to_datetime(df['date'])
-            df = calculate_financial_metrics(df)
+            df, preview = load_and_prepare(uploaded_file)
             
             # Display data summary
             st.sidebar.success("✅ File successfully uploaded!")
@@ -189,22 +296,21 @@ def main():
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                total_revenue = df['revenue'].sum()
+                total_revenue = column_total(df['revenue'])
                 st.metric("Total Revenue", f"${total_revenue:,.2f}")
             
             with col2:
-                total_gross_profit = df['gross_profit'].sum()
-                gross_margin = (total_gross_profit / total_revenue) * 100
+                total_gross_profit = column_total(df['gross_profit'])
+                gross_margin = margin_pct(total_gross_profit, total_revenue)
                 st.metric("Gross Profit", f"${total_gross_profit:,.2f}", f"{gross_margin:.1f}% margin")
             
             with col3:
-                total_net_profit = df['net_profit'].sum()
-                net_margin = (total_net_profit / total_revenue) * 100
-                profit_color = "positive-value" if total_net_profit >= 0 else "negative-value"
+                total_net_profit = column_total(df['net_profit'])
+                net_margin = margin_pct(total_net_profit, total_revenue)
                 st.metric("Net Profit", f"${total_net_profit:,.2f}", f"{net_margin:.1f}% margin")
             
             with col4:
-                avg_daily_revenue = df['revenue'].mean()
+                avg_daily_revenue = np.nanmean(df['revenue'].to_numpy(), dtype='float64')
                 st.metric("Avg Daily Revenue", f"${avg_daily_revenue:,.2f}")
             
             # Liquidity Ratios (placeholder - would need balance sheet data)
@@ -226,39 +332,16 @@ def main():
             tab1, tab2, tab3 = st.tabs(["Profit Trends", "Expenses Breakdown", "Profit Margins"])
             
             with tab1:
-                fig_profit = create_profit_trend_chart(df)
-                st.plotly_chart(fig_profit, use_container_width=True)
+                render_profit_tab(df)
             
             with tab2:
-                fig_expenses = create_expenses_chart(df)
-                st.plotly_chart(fig_expenses, use_container_width=True)
-                
-                # Detailed expenses breakdown
-                st.subheader("Detailed Expenses Summary")
-                exp_col1, exp_col2 = st.columns(2)
-                
-                with exp_col1:
-                    st.write("**Operating Expenses:**")
-                    st.write(f"- Salaries: ${df['salaries'].sum():,.2f}")
-                    st.write(f"- Rent: ${df['rent'].sum():,.2f}")
-                    st.write(f"- Marketing: ${df['marketing'].sum():,.2f}")
-                    st.write(f"- Utilities: ${df['utilities'].sum():,.2f}")
-                    st.write(f"**Total Operating: ${df['operating_expenses'].sum():,.2f}**")
-                
-                with exp_col2:
-                    st.write("**Non-Operating Expenses:**")
-                    st.write(f"- Interest Paid: ${df['interest_paid'].sum():,.2f}")
-                    st.write(f"- Investment Losses: ${df['investment_losses'].sum():,.2f}")
-                    st.write(f"- Legal Settlements: ${df['legal_settlements'].sum():,.2f}")
-                    st.write(f"**Total Non-Operating: ${df['non_operating_expenses'].sum():,.2f}**")
+                render_expenses_tab(df)
             
             with tab3:
-                fig_margins = create_margin_chart(df)
-                st.plotly_chart(fig_margins, use_container_width=True)
+                render_margins_tab(df)
             
             # Raw data preview
-            st.header(" Data Preview")
-            st.dataframe(df.sort_values('date', ascending=False).head(10), use_container_width=True)
+            render_data_preview(preview)
             
            
         
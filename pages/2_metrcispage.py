@@ -4,6 +4,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
+import io
+
+from kernels import metrics_kernel  # None when numba is not installed
 
 # Page configuration
 st.set_page_config(
@@ -52,121 +55,260 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Raw columns fed to the metric arithmetic, after the two computed durations
+METRIC_INPUTS = ['labor_hours_planned', 'labor_hours_actual', 'planned_budget', 'actual_budget']
+
+DATE_COLUMNS = ['start_date', 'end_date', 'actual_end_date']
+
+def _nonzero(denominator):
+    """Replace zero divisors with 1, as a single array op"""
+    return np.where(denominator == 0, 1, denominator)
+
+def _days_between(start, end):
+    """Whole days from start to end, via datetime64[D] subtraction (NaN where a date is missing)"""
+    delta = end.to_numpy().astype('datetime64[D]') - start.to_numpy().astype('datetime64[D]')
+    missing = np.isnat(delta)
+    if not missing.any():
+        return delta.astype('int64')
+    days = delta.astype('float64')
+    days[missing] = np.nan
+    return days
+
 def calculate_construction_metrics(df):
     """Calculate all construction metrics from the dataframe"""
     
-    # Convert dates
-    date_columns = ['start_date', 'end_date', 'actual_end_date']
-    for col in date_columns:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
+    # Convert dates read_csv could not parse (explicit ISO format keeps pandas on its fast C parser)
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d', errors='coerce', cache=True)
     
-    # Filter projects by status
-    completed_projects = df[df['project_status'] == 'Completed'].copy()
-    in_progress_projects = df[df['project_status'] == 'In Progress'].copy()
-    confirmed_projects = df[df['project_status'] == 'Confirmed'].copy()
+    # Filter projects by status (one pass over the status column for all three).
+    # groupby already hands back fresh frames, so no extra .copy() is needed.
+    groups = dict(tuple(df.groupby('project_status', sort=False, observed=True)))
+    empty = df.iloc[:0]
+    completed_projects = groups.get('Completed', empty)
+    in_progress_projects = groups.get('In Progress', empty)
+    confirmed_projects = groups.get('Confirmed', empty)
     
     # Calculate metrics for completed projects
     if not completed_projects.empty:
         # Calculate durations
-        completed_projects['planned_duration'] = (completed_projects['end_date'] - completed_projects['start_date']).dt.days
-        completed_projects['actual_duration'] = (completed_projects['actual_end_date'] - completed_projects['start_date']).dt.days
+        start = completed_projects['start_date']
+        planned_duration = _days_between(start, completed_projects['end_date'])
+        actual_duration = _days_between(start, completed_projects['actual_end_date'])
         
         # Calculate variances and productivity
-        completed_projects['schedule_variance'] = ((completed_projects['planned_duration'] - completed_projects['actual_duration']) / completed_projects['planned_duration'].replace(0, 1)) * 100
-        completed_projects['labor_productivity'] = (completed_projects['labor_hours_planned'] / completed_projects['labor_hours_actual'].replace(0, 1)) * 100
-        completed_projects['budget_variance'] = ((completed_projects['actual_budget'] - completed_projects['planned_budget']) / completed_projects['planned_budget'].replace(0, 1)) * 100
+        inputs = (
+            planned_duration.astype('float64'), actual_duration.astype('float64'),
+            *(completed_projects[c].to_numpy(dtype='float64', na_value=np.nan) for c in METRIC_INPUTS)
+        )
+        if metrics_kernel is not None:
+            outputs = tuple(np.empty(len(completed_projects)) for _ in range(3))
+            metrics_kernel(*inputs, *outputs)
+        else:
+            planned, actual, hours_planned, hours_actual, budget_planned, budget_actual = inputs
+            outputs = (
+                (planned - actual) / _nonzero(planned) * 100,
+                hours_planned / _nonzero(hours_actual) * 100,
+                (budget_actual - budget_planned) / _nonzero(budget_planned) * 100
+            )
+        
+        # Attach only the derived columns; the status slice itself is not copied again
+        derived = pd.DataFrame({
+            'planned_duration': planned_duration,
+            'actual_duration': actual_duration,
+            'schedule_variance': outputs[0],
+            'labor_productivity': outputs[1],
+            'budget_variance': outputs[2]
+        }, index=completed_projects.index)
+        completed_projects = completed_projects.join(derived)
     
     return df, completed_projects, in_progress_projects, confirmed_projects
 
-def create_schedule_variance_chart(completed_projects):
-    """Create schedule variance chart by project"""
+# Final column types, written directly by the C parser in a single pass.
+# Integer columns are nullable, since in-progress projects may leave them blank.
+COLUMN_DTYPES = {
+    'project_id': 'Int32',
+    'project_name': 'str',
+    'project_status': 'category',
+    'planned_budget': 'float32',
+    'actual_budget': 'float32',
+    'labor_hours_planned': 'Int32',
+    'labor_hours_actual': 'Int32',
+    'client_satisfaction_score': 'float32',
+    'project_difficulty': 'category'
+}
+
+# project_id is kept for the raw preview when present, but nothing requires it
+OPTIONAL_COLS = ['project_id']
+REQUIRED_COLS = [*(c for c in COLUMN_DTYPES if c not in OPTIONAL_COLS), *DATE_COLUMNS]
+LOADED_COLS = {*REQUIRED_COLS, *OPTIONAL_COLS}
+
+@st.cache_resource
+def warm_up_metrics_kernel():
+    """Compile the numba kernel once per server process instead of on first upload"""
+    if metrics_kernel is not None:
+        ones = np.ones(1)
+        metrics_kernel(*(ones,) * (2 + len(METRIC_INPUTS)), *(np.empty(1) for _ in range(3)))
+
+warm_up_metrics_kernel()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_construction_data(data):
+    """Parse the uploaded CSV bytes and calculate metrics, cached per file content"""
+    df = pd.read_csv(
+        io.BytesIO(data),
+        usecols=lambda col: col in LOADED_COLS,
+        dtype=COLUMN_DTYPES,
+        parse_dates=DATE_COLUMNS,
+        date_format='%Y-%m-%d'
+    )
+    missing = [col for col in REQUIRED_COLS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    return calculate_construction_metrics(df)
+
+def _frame_hash(d):
+    """Content hash used to key cached figures on their dataframe (row order included)"""
+    return d.shape, pd.util.hash_pandas_object(d).to_numpy().tobytes()
+
+@st.cache_data(max_entries=16, show_spinner=False, hash_funcs={pd.DataFrame: _frame_hash})
+def _bar(completed_projects, y, title, labels, midpoint=None, range_color=None):
+    """Colour-scaled bar chart of one metric per completed project, as a plotly JSON dict"""
     if completed_projects.empty:
         return None
         
-    fig = px.bar(
-        completed_projects,
-        x='project_name',
-        y='schedule_variance',
-        title='Schedule Variance by Project (%)',
-        labels={'schedule_variance': 'Schedule Variance %', 'project_name': 'Project'},
-        color='schedule_variance',
-        color_continuous_scale=['#e74c3c', '#f39c12', '#27ae60'],
-        color_continuous_midpoint=0
+    values = completed_projects[y].to_numpy()
+    color_range = dict(cmin=range_color[0], cmax=range_color[1]) if range_color else {}
+    fig = go.Figure(go.Bar(
+        x=completed_projects['project_name'].to_numpy(),
+        y=values,
+        marker=dict(
+            color=values,
+            colorscale=['#e74c3c', '#f39c12', '#27ae60'],
+            cmid=midpoint,
+            colorbar=dict(title=dict(text=labels[y])),
+            showscale=True,
+            **color_range
+        ),
+        hovertemplate=f"{labels['project_name']}=%{{x}}<br>{labels[y]}=%{{y}}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels['project_name'],
+        yaxis_title=labels[y],
+        height=400
+    )
+    # Cache the serialized figure: a hit copies a plain dict instead of rebuilding the traces
+    # (st.plotly_chart still validates it into a Figure when drawing)
+    return fig.to_plotly_json()
+
+def create_schedule_variance_chart(completed_projects):
+    """Create schedule variance chart by project"""
+    return _bar(
+        completed_projects, 'schedule_variance', 'Schedule Variance by Project (%)',
+        {'schedule_variance': 'Schedule Variance %', 'project_name': 'Project'},
+        midpoint=0
     )
-    fig.update_layout(height=400)
-    return fig
 
 def create_productivity_chart(completed_projects):
     """Create labor productivity chart"""
-    if completed_projects.empty:
-        return None
-        
-    fig = px.bar(
-        completed_projects,
-        x='project_name',
-        y='labor_productivity',
-        title='Labor Productivity by Project (%)',
-        labels={'labor_productivity': 'Productivity %', 'project_name': 'Project'},
-        color='labor_productivity',
-        color_continuous_scale=['#e74c3c', '#f39c12', '#27ae60'],
-        color_continuous_midpoint=100
+    return _bar(
+        completed_projects, 'labor_productivity', 'Labor Productivity by Project (%)',
+        {'labor_productivity': 'Productivity %', 'project_name': 'Project'},
+        midpoint=100
     )
-    fig.update_layout(height=400)
-    return fig
 
 def create_budget_variance_chart(completed_projects):
     """Create budget variance chart"""
-    if completed_projects.empty:
-        return None
-        
-    fig = px.bar(
-        completed_projects,
-        x='project_name',
-        y='budget_variance',
-        title='Budget Variance by Project (%)',
-        labels={'budget_variance': 'Budget Variance %', 'project_name': 'Project'},
-        color='budget_variance',
-        color_continuous_scale=['#e74c3c', '#f39c12', '#27ae60'],
-        color_continuous_midpoint=0
+    return _bar(
+        completed_projects, 'budget_variance', 'Budget Variance by Project (%)',
+        {'budget_variance': 'Budget Variance %', 'project_name': 'Project'},
+        midpoint=0
     )
-    fig.update_layout(height=400)
-    return fig
 
 def create_satisfaction_chart(completed_projects):
     """Create client satisfaction chart"""
-    if completed_projects.empty:
-        return None
-        
-    fig = px.bar(
-        completed_projects,
-        x='project_name',
-        y='client_satisfaction_score',
-        title='Client Satisfaction by Project',
-        labels={'client_satisfaction_score': 'Satisfaction Score', 'project_name': 'Project'},
-        color='client_satisfaction_score',
-        color_continuous_scale=['#e74c3c', '#f39c12', '#27ae60'],
+    return _bar(
+        completed_projects, 'client_satisfaction_score', 'Client Satisfaction by Project',
+        {'client_satisfaction_score': 'Satisfaction Score', 'project_name': 'Project'},
         range_color=[0, 5]
     )
-    fig.update_layout(height=400)
-    return fig
 
+STATUS_COLORS = {
+    'Completed': '#27ae60',
+    'In Progress': '#f39c12',
+    'Confirmed': '#3498db'
+}
+
+@st.cache_data(max_entries=8, show_spinner=False, hash_funcs={pd.DataFrame: _frame_hash})
 def create_project_status_chart(df):
-    """Create project status distribution chart"""
-    status_counts = df['project_status'].value_counts()
-    fig = px.pie(
-        values=status_counts.values,
-        names=status_counts.index,
-        title='Project Status Distribution',
-        color=status_counts.index,
-        color_discrete_map={
-            'Completed': '#27ae60',
-            'In Progress': '#f39c12',
-            'Confirmed': '#3498db'
-        }
-    )
-    fig.update_layout(height=400)
-    return fig
+    """Create project status distribution chart, as a plotly JSON dict"""
+    status = df['project_status'].cat
+    codes = status.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(status.categories))
+    names = status.categories.tolist()
+    # Statuses without a fixed colour take the plotly palette, as px.pie did
+    palette = iter(px.colors.qualitative.Plotly * len(names))
+    colors = [STATUS_COLORS.get(name) or next(palette) for name in names]
+    fig = go.Figure(go.Pie(
+        values=counts,
+        labels=names,
+        marker=dict(colors=colors)
+    ))
+    fig.update_layout(title='Project Status Distribution', height=400)
+    return fig.to_plotly_json()
+
+# Column order and formatting for the completed-projects table; the browser sorts it
+COMPLETED_COLUMN_CONFIG = {
+    'project_name': st.column_config.TextColumn('Project'),
+    'planned_duration': st.column_config.NumberColumn('Planned Days'),
+    'actual_duration': st.column_config.NumberColumn('Actual Days'),
+    'schedule_variance': st.column_config.NumberColumn('Schedule Variance %', format='%.1f%%'),
+    'labor_hours_planned': st.column_config.NumberColumn('Planned Hours'),
+    'labor_hours_actual': st.column_config.NumberColumn('Actual Hours'),
+    'labor_productivity': st.column_config.NumberColumn('Productivity %', format='%.1f%%'),
+    'planned_budget': st.column_config.NumberColumn('Planned Budget', format='$%.0f'),
+    'actual_budget': st.column_config.NumberColumn('Actual Budget', format='$%.0f'),
+    'budget_variance': st.column_config.NumberColumn('Budget Variance %', format='%.1f%%'),
+    'client_satisfaction_score': st.column_config.NumberColumn('Satisfaction Score', format='%.1f'),
+    'project_difficulty': st.column_config.TextColumn('Difficulty')
+}
+
+def _chart_or_info(fig, analysis):
+    """Show a cached chart, or a note when there are no completed projects"""
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info(f"No completed projects available for {analysis} analysis.")
+
+@st.fragment
+def render_schedule_tab(completed_projects):
+    """Schedule performance tab, rerun independently of the rest of the page"""
+    _chart_or_info(create_schedule_variance_chart(completed_projects), "schedule")
+
+@st.fragment
+def render_productivity_tab(completed_projects):
+    """Labor productivity tab"""
+    _chart_or_info(create_productivity_chart(completed_projects), "productivity")
+
+@st.fragment
+def render_budget_tab(completed_projects):
+    """Budget performance tab"""
+    _chart_or_info(create_budget_variance_chart(completed_projects), "budget")
+
+@st.fragment
+def render_satisfaction_tab(completed_projects):
+    """Client satisfaction tab"""
+    _chart_or_info(create_satisfaction_chart(completed_projects), "satisfaction")
+
+@st.fragment
+def render_overview_tab(df):
+    """Project status distribution and portfolio overview tab"""
+    st.plotly_chart(create_project_status_chart(df), use_container_width=True)
+    st.subheader("Project Portfolio Overview")
+    overview_data = df[['project_name', 'project_status', 'start_date', 'end_date', 'planned_budget', 'project_difficulty']]
+    st.dataframe(overview_data, use_container_width=True)
 
 def main():
     st.title("Irasse Construction Metrics Page" )
@@ -182,8 +324,7 @@ def main():
     if uploaded_file is not None:
         try:
             # Read and process data
-            df = pd.read_csv(uploaded_file)
-            df, completed_projects, in_progress_projects, confirmed_projects = calculate_construction_metrics(df)
+            df, completed_projects, in_progress_projects, confirmed_projects = load_construction_data(uploaded_file.getvalue())
             
             # Display data summary
             st.sidebar.success("File successfully uploaded!")
@@ -192,27 +333,32 @@ def main():
             # Key Metrics Header
             st.header("Key Performance Indicators")
             
+            # All completed-project averages in one vectorized reduction
+            kpis = None
+            if not completed_projects.empty:
+                kpis = completed_projects[[
+                    'schedule_variance', 'labor_productivity',
+                    'client_satisfaction_score', 'budget_variance'
+                ]].mean()
+            
             # Metrics Row 1
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                if not completed_projects.empty:
-                    avg_schedule_variance = completed_projects['schedule_variance'].mean()
-                    st.metric("Avg Schedule Variance", f"{avg_schedule_variance:.1f}%")
+                if kpis is not None:
+                    st.metric("Avg Schedule Variance", f"{kpis['schedule_variance']:.1f}%")
                 else:
                     st.metric("Avg Schedule Variance", "N/A")
             
             with col2:
-                if not completed_projects.empty:
-                    avg_productivity = completed_projects['labor_productivity'].mean()
-                    st.metric("Avg Labor Productivity", f"{avg_productivity:.1f}%")
+                if kpis is not None:
+                    st.metric("Avg Labor Productivity", f"{kpis['labor_productivity']:.1f}%")
                 else:
                     st.metric("Avg Labor Productivity", "N/A")
             
             with col3:
-                if not completed_projects.empty:
-                    avg_satisfaction = completed_projects['client_satisfaction_score'].mean()
-                    st.metric("Avg Client Satisfaction", f"{avg_satisfaction:.1f}/5.0")
+                if kpis is not None:
+                    st.metric("Avg Client Satisfaction", f"{kpis['client_satisfaction_score']:.1f}/5.0")
                 else:
                     st.metric("Avg Client Satisfaction", "N/A")
             
@@ -239,9 +385,8 @@ def main():
                 st.markdown('</div>', unsafe_allow_html=True)
             
             with col8:
-                if not completed_projects.empty:
-                    avg_budget_variance = completed_projects['budget_variance'].mean()
-                    st.metric("Avg Budget Variance", f"{avg_budget_variance:.1f}%")
+                if kpis is not None:
+                    st.metric("Avg Budget Variance", f"{kpis['budget_variance']:.1f}%")
                 else:
                     st.metric("Avg Budget Variance", "N/A")
             
@@ -257,51 +402,30 @@ def main():
             ])
             
             with tab1:
-                fig_schedule = create_schedule_variance_chart(completed_projects)
-                if fig_schedule:
-                    st.plotly_chart(fig_schedule, use_container_width=True)
-                    st.subheader("Schedule Performance Details")
-                    schedule_data = completed_projects[['project_name', 'planned_duration', 'actual_duration', 'schedule_variance']]
-                    st.dataframe(schedule_data.sort_values('schedule_variance', ascending=False), use_container_width=True)
-                else:
-                    st.info("No completed projects available for schedule analysis.")
+                render_schedule_tab(completed_projects)
             
             with tab2:
-                fig_productivity = create_productivity_chart(completed_projects)
-                if fig_productivity:
-                    st.plotly_chart(fig_productivity, use_container_width=True)
-                    st.subheader("Labor Productivity Details")
-                    productivity_data = completed_projects[['project_name', 'labor_hours_planned', 'labor_hours_actual', 'labor_productivity']]
-                    st.dataframe(productivity_data.sort_values('labor_productivity', ascending=False), use_container_width=True)
-                else:
-                    st.info("No completed projects available for productivity analysis.")
+                render_productivity_tab(completed_projects)
             
             with tab3:
-                fig_budget = create_budget_variance_chart(completed_projects)
-                if fig_budget:
-                    st.plotly_chart(fig_budget, use_container_width=True)
-                    st.subheader("Budget Performance Details")
-                    budget_data = completed_projects[['project_name', 'planned_budget', 'actual_budget', 'budget_variance']]
-                    st.dataframe(budget_data.sort_values('budget_variance', ascending=False), use_container_width=True)
-                else:
-                    st.info("No completed projects available for budget analysis.")
+                render_budget_tab(completed_projects)
             
             with tab4:
-                fig_satisfaction = create_satisfaction_chart(completed_projects)
-                if fig_satisfaction:
-                    st.plotly_chart(fig_satisfaction, use_container_width=True)
-                    st.subheader("Client Satisfaction Details")
-                    satisfaction_data = completed_projects[['project_name', 'client_satisfaction_score', 'project_difficulty']]
-                    st.dataframe(satisfaction_data.sort_values('client_satisfaction_score', ascending=False), use_container_width=True)
-                else:
-                    st.info("No completed projects available for satisfaction analysis.")
+                render_satisfaction_tab(completed_projects)
             
             with tab5:
-                fig_status = create_project_status_chart(df)
-                st.plotly_chart(fig_status, use_container_width=True)
-                st.subheader("Project Portfolio Overview")
-                overview_data = df[['project_name', 'project_status', 'start_date', 'end_date', 'planned_budget', 'project_difficulty']]
-                st.dataframe(overview_data, use_container_width=True)
+                render_overview_tab(df)
+            
+            # One sortable table for all completed-project metrics, sent once per rerun
+            if not completed_projects.empty:
+                st.subheader("Completed Project Details")
+                st.dataframe(
+                    completed_projects,
+                    column_config=COMPLETED_COLUMN_CONFIG,
+                    column_order=list(COMPLETED_COLUMN_CONFIG),
+                    hide_index=True,
+                    use_container_width=True
+                )
             
             # Raw data preview
             st.header(" Raw Data Preview")
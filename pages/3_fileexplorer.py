@@ -1,4 +1,5 @@
 import streamlit as st
+from collections import defaultdict
 
 # Page title
 st.title(" File Explorer")
@@ -14,6 +15,16 @@ documents = [
     {"name": "Quality Standards", "type": "pdf", "keywords": "quality standards"}
 ]
 
+# Lowercased name + keywords per document, built once instead of per keystroke
+# (newline-joined so a term can't match across the two fields)
+_lc_index = [(doc, (doc["name"] + "\n" + doc["keywords"]).lower()) for doc in documents]
+
+# Inverted index: whole-word token -> documents containing it, in list order
+_token_index = defaultdict(list)
+for doc, lc in _lc_index:
+    for token in dict.fromkeys(lc.split()):
+        _token_index[token].append(doc)
+
 # Search bar
 search_term = st.text_input("Search documents", placeholder="Type keywords like 'proposal', 'safety', 'budget'...")
 
@@ -21,10 +32,11 @@ search_term = st.text_input("Search documents", placeholder="Type keywords like
 if search_term:
     st.write(f"Search results for: **{search_term}**")
     
-    found_docs = []
-    for doc in documents:
-        if search_term.lower() in doc["keywords"].lower() or search_term.lower() in doc["name"].lower():
-            found_docs.append(doc)
+    needle = search_term.lower().strip()
+    # Whole-word keyword lookup first; substring scan only when that misses
+    found_docs = _token_index.get(needle, [])
+    if not found_docs:
+        found_docs = [doc for doc, lc in _lc_index if needle in lc]
     
     if found_docs:
         for doc in found_docs:
@@ -32,10 +44,13 @@ if search_term:
             st.write("---")
             st.write(f"**{doc['name']}** ({doc['type'].upper()})")
             st.write(f"*Keywords: {doc['keywords']}*")
-            
-            # Simple download button
-            if st.button(f"Download {doc['name']}", key=doc["name"]):
-                st.success(f"Downloading {doc['name']}...")
+        
+        # One download form instead of a button per document; only submitting reruns
+        st.write("---")
+        with st.form("results"):
+            selected = st.radio("Select a document", [doc["name"] for doc in found_docs])
+            if st.form_submit_button("Download"):
+                st.success(f"Downloading {selected}...")
     else:
         st.warning("No documents found. Try different keywords.")
         